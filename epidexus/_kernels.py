@@ -0,0 +1,153 @@
+# Epidexus - Agent Based Location-Graph Epidemic Simulation
+# Kernels - Compiled loops over the population arrays
+#
+# Copyright (C) 2020  Karl D. Hansen, Aalborg University <kdh@es.aau.dk>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from .infectionstate import _S, _E, _I, _R
+from .population import TRANSITION_NEVER
+
+# Numba is optional. Without it, the kernels fall back to NumPy
+# implementations with the same signatures.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _count_at_locations_numpy(state, loc_id, num_locations):
+    """NumPy version of count_at_locations, used when Numba is not available."""
+    return (np.bincount(loc_id[state == _I], minlength=num_locations),
+            np.bincount(loc_id[state == _S], minlength=num_locations),
+            np.bincount(loc_id, minlength=num_locations))
+
+
+def _count_at_locations_loop(state, loc_id, num_locations):
+    """Counts the infected, susceptible and present persons at each location.
+
+    The counts are made in a single pass over the persons, without
+    the temporary arrays of a masked bincount. The loop is serial, as
+    parallel increments of the same location would race.
+
+    Arguments:
+        state: SEIR codes of the persons.
+        loc_id: Index of the current location of each person.
+        num_locations: The number of locations.
+
+    Returns:
+        (num_infected, num_susceptible, num_present), three arrays
+        indexed by location.
+    """
+    num_infected = np.zeros(num_locations, dtype=np.int64)
+    num_susceptible = np.zeros(num_locations, dtype=np.int64)
+    num_present = np.zeros(num_locations, dtype=np.int64)
+    for i in range(state.shape[0]):
+        loc = loc_id[i]
+        num_present[loc] += 1
+        s = state[i]
+        if s == _I:
+            num_infected[loc] += 1
+        elif s == _S:
+            num_susceptible[loc] += 1
+    return num_infected, num_susceptible, num_present
+
+
+def _update_seir_numpy(state, scheduled, infected_when, onset_at, recover_at,
+                       exposed, now, incubation, recovering):
+    """NumPy version of update_seir, used when Numba is not available."""
+    onset = (state == _E) & scheduled & (onset_at < now)
+    recovered = (state == _I) & scheduled & (recover_at < now)
+    state[onset] = _I
+    state[recovered] = _R
+    state[exposed] = _E
+    infected_when[exposed] = now
+    onset_at[exposed] = now + incubation
+    recover_at[exposed] = now + incubation + recovering
+    next_transition = min(
+        onset_at[(state == _E) & scheduled].min(initial=TRANSITION_NEVER),
+        recover_at[(state == _I) & scheduled].min(initial=TRANSITION_NEVER))
+    return (np.count_nonzero(scheduled[exposed]), np.count_nonzero(onset),
+            np.count_nonzero(recovered), next_transition)
+
+
+def _update_seir_loop(state, scheduled, infected_when, onset_at, recover_at,
+                      exposed, now, incubation, recovering):
+    """Advances the SEIR state of all persons one time step.
+
+    The given persons are exposed. Exposed and infected persons move
+    on when their onset and recovery times have passed, and the
+    earliest time left is kept track of, in a single pass. Only the
+    scheduled persons move on, and only they are counted.
+
+    Arguments:
+        state: SEIR codes of the persons (modified in place).
+        scheduled: Whether each person is added to the model.
+        infected_when: Time of exposure, in seconds (modified in place).
+        onset_at: Time of becoming infectious, in seconds (modified in place).
+        recover_at: Time of recovery, in seconds (modified in place).
+        exposed: Indices of the susceptible persons getting exposed.
+        now: The current time, in seconds.
+        incubation: The incubation time, in seconds.
+        recovering: The recovering time, in seconds.
+
+    Returns:
+        (num_exposed, num_infected, num_recovered, next_transition),
+        the number of scheduled persons that moved into each state, and
+        the earliest onset or recovery time left, after which the next
+        transition can happen.
+    """
+    # The newly exposed are not due before the end of their incubation,
+    # so the pass below leaves them as they are.
+    num_exposed = 0
+    for j in range(exposed.shape[0]):
+        i = exposed[j]
+        if scheduled[i]:
+            num_exposed += 1
+        state[i] = _E
+        infected_when[i] = now
+        onset_at[i] = now + incubation
+        recover_at[i] = now + incubation + recovering
+    num_infected = 0
+    num_recovered = 0
+    next_transition = TRANSITION_NEVER
+    for i in range(state.shape[0]):
+        if not scheduled[i]:
+            continue
+        s = state[i]
+        if s == _E:
+            if onset_at[i] < now:
+                state[i] = _I
+                num_infected += 1
+                next_transition = min(next_transition, recover_at[i])
+            else:
+                next_transition = min(next_transition, onset_at[i])
+        elif s == _I:
+            if recover_at[i] < now:
+                state[i] = _R
+                num_recovered += 1
+            else:
+                next_transition = min(next_transition, recover_at[i])
+    return num_exposed, num_infected, num_recovered, next_transition
+
+
+# The compiled kernels release the GIL, so models stepped in separate
+# threads run them concurrently.
+if njit is None:
+    count_at_locations = _count_at_locations_numpy
+    update_seir = _update_seir_numpy
+else:
+    count_at_locations = njit(nogil=True, cache=True)(_count_at_locations_loop)
+    update_seir = njit(nogil=True, fastmath=True, cache=True)(_update_seir_loop)
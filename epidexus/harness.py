@@ -0,0 +1,71 @@
+# Epidexus - Agent Based Location-Graph Epidemic Simulation
+# Harness - Runs independent replicates of a scenario in parallel
+#
+# Copyright (C) 2020  Karl D. Hansen, Aalborg University <kdh@es.aau.dk>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Iterable
+
+
+def run_replicate(seed: int, scenario, scenario_args: dict, interval: timedelta):
+    """Runs a single replicate of a scenario.
+
+    The scenario is created from scratch, seeded and simulated for
+    the interval. This is a top-level function, so it can be sent
+    to worker processes.
+
+    Arguments:
+        seed: Seed for the random number generator of the replicate.
+        scenario: The scenario class, e.g. OneLocation or TwoAges.
+        scenario_args: Keyword arguments for creating the scenario.
+        interval: The amount of simulated time.
+
+    Returns:
+        The SEIR time series as a DataFrame from the data collector.
+    """
+    sim = scenario(**scenario_args)
+    sim.set_seed(seed)
+    sim.simulate(interval)
+    return sim.sim_model.datacollector.get_model_vars_dataframe()
+
+
+def run_replicates(seeds: Iterable[int], scenario, scenario_args: dict,
+                   interval: timedelta, max_workers=None):
+    """Runs replicates of a scenario in parallel processes.
+
+    Each seed gives an independent replicate, run by run_replicate
+    in a pool of worker processes. The results are returned rather
+    than shared, so the replicates do not interfere.
+
+    Arguments:
+        seeds: One seed per replicate.
+        scenario: The scenario class, e.g. OneLocation or TwoAges.
+        scenario_args: Keyword arguments for creating the scenario.
+        interval: The amount of simulated time.
+        max_workers: Number of processes (defaults to the CPU count).
+
+    Returns:
+        A list of SEIR time series, in the order of the seeds.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    replicate = partial(run_replicate, scenario=scenario,
+                        scenario_args=scenario_args, interval=interval)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(replicate, seeds))
@@ -0,0 +1,81 @@
+# Epidexus - Agent Based Location-Graph Epidemic Simulation
+# History - Daily record of the SEIR counts
+#
+# Copyright (C) 2020  Karl D. Hansen, Aalborg University <kdh@es.aau.dk>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pandas as pd
+
+
+class SEIRHistory:
+    """Records the date and the SEIR counts of a model.
+
+    This takes the place of MESA's DataCollector for the model. The
+    counts are written straight into preallocated NumPy arrays, which
+    are grown by doubling when full, instead of calling a reporter
+    function per column. It offers the same get_model_vars_dataframe
+    and model_vars as the DataCollector. The DataFrame is kept until
+    the next record, so asking for it repeatedly builds it only once.
+    Each caller gets a copy of it, which they are free to change.
+
+    Arguments:
+        capacity: The number of records to allocate room for.
+    """
+
+    COLUMNS = ("Date", "S", "E", "I", "R")
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.dates = np.empty(capacity, dtype='datetime64[s]')
+        self.seir = np.empty((capacity, 4), dtype=np.int64)
+        self._dataframe = None
+
+    def reserve(self, num_records: int) -> None:
+        """Makes room for num_records more records without growing."""
+        capacity = self.size + num_records
+        if capacity > len(self.dates):
+            self._resize(capacity)
+
+    def _resize(self, capacity):
+        dates = np.empty(capacity, dtype=self.dates.dtype)
+        dates[:self.size] = self.dates[:self.size]
+        seir = np.empty((capacity, 4), dtype=self.seir.dtype)
+        seir[:self.size] = self.seir[:self.size]
+        self.dates, self.seir = dates, seir
+
+    def collect(self, model) -> None:
+        """Records the current date and SEIR counts of the model."""
+        if self.size == len(self.dates):
+            self._resize(2 * len(self.dates))
+        self.dates[self.size] = np.datetime64(model.current_date, 's')
+        self.seir[self.size] = model.seir_counts
+        self.size += 1
+        self._dataframe = None
+
+    @property
+    def model_vars(self) -> dict:
+        """The recorded columns as a dict of arrays."""
+        columns = {"Date": self.dates[:self.size]}
+        for i, name in enumerate(self.COLUMNS[1:]):
+            columns[name] = self.seir[:self.size, i]
+        return columns
+
+    def get_model_vars_dataframe(self):
+        """The recorded columns as a new pandas DataFrame."""
+        if self._dataframe is None:
+            self._dataframe = pd.DataFrame(self.model_vars,
+                                           columns=self.COLUMNS)
+        return self._dataframe.copy()
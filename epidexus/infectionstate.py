@@ -16,8 +16,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
+import numpy as np
 
 
 class SEIR(Enum):
@@ -30,43 +31,71 @@ class SEIR(Enum):
     RECOVERED = 3
 
 
+# Plain integer codes of the SEIR states, as stored in the population
+# arrays. Comparing these avoids the Enum lookups in the hot paths.
+_S, _E, _I, _R = 0, 1, 2, 3
+
+
 class InfectionState:
-    """Tracks and updates the infection of a person."""
+    """Tracks and updates the infection of a person.
+
+    The SEIR state and the time of infection are stored in the
+    model's PopulationArrays; this class is a view on the entries
+    of a single person. The state transitions after infection are
+    made for all persons at once by the model.
+
+    Arguments:
+        model: The model holding the state in its population.
+        index: The index of the person in the population.
+    """
 
-    def __init__(self, seir=SEIR.SUSCEPTIBLE, incubation_time=timedelta(days=4),
-                 recovering_time=timedelta(days=10)):
-        self.seir = seir
-        self.infected_when = None
-        self.incubation_time = incubation_time
-        self.recovering_time = recovering_time
+    __slots__ = ('_model', '_population', '_index')
+
+    def __init__(self, model, index):
+        self._model = model
+        self._population = model.population
+        self._index = index
 
     def __str__(self):
         return self.seir.name.capitalize()
 
+    @property
+    def seir(self) -> SEIR:
+        return SEIR(self._population.seir_state[self._index])
+
+    @seir.setter
+    def seir(self, value: SEIR):
+        self._population.set_seir(self._index, value.value,
+                                  self._model.current_s)
+
+    @property
+    def seir_int(self) -> int:
+        """The SEIR state as its plain integer code, e.g. _I for infected."""
+        return int(self._population.seir_state[self._index])
+
+    @property
+    def infected_when(self):
+        when = self._population.infected_when[self._index]
+        if np.isnat(when):
+            return None
+        return when.astype(datetime)
+
+    @infected_when.setter
+    def infected_when(self, when: datetime):
+        if when is None:
+            when = 'NaT'
+        self._population.set_infected_when(self._index, when)
+
     def is_suceptible(self) -> bool:
-        if self.seir == SEIR.SUSCEPTIBLE:
-            return True
-        else:
-            return False
+        return self.seir_int == _S
 
     def infect(self, when: datetime) -> bool:
-        if self.seir == SEIR.SUSCEPTIBLE:
-            self.seir = SEIR.EXPOSED
+        if self._population.seir_state[self._index] == _S:
+            self._population.set_seir(self._index, _E, self._model.current_s)
             self.infected_when = when
             return True
         else:
             return False
 
     def is_infected(self) -> bool:
-        if self.seir == SEIR.INFECTED:
-            return True
-        else:
-            return False
-
-    def update(self, current_time):
-        if (self.seir is SEIR.EXPOSED and
-                self.infected_when + self.incubation_time < current_time):
-            self.seir = SEIR.INFECTED
-        elif (self.seir is SEIR.INFECTED and
-                self.infected_when + self.incubation_time + self.recovering_time < current_time):
-            self.seir = SEIR.RECOVERED
\ No newline at end of file
+        return self.seir_int == _I
@@ -16,10 +16,40 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from bisect import insort
-from datetime import datetime
+import heapq
+import weakref
+from itertools import count
+from datetime import datetime, timedelta
 from . import Location
 
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_SECOND = timedelta(seconds=1)
+
+
+def to_seconds(when: datetime) -> int:
+    """Convert a (naive) datetime to whole seconds since the epoch."""
+    return (when - _EPOCH) // _ONE_SECOND
+
+
+def from_seconds(seconds: int) -> datetime:
+    """Convert whole seconds since the epoch to a (naive) datetime."""
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def shared_reschedule(reschedule):
+    """Mark a reschedule method whose result can be shared.
+
+    Use this on a reschedule that only depends on the current time, the
+    times of the entry and what all persons holding it have in common,
+    so the persons can share its result, see rescheduled_at. It only
+    applies to the method it marks, so an override in a subclass is not
+    shared unless it is marked too.
+    """
+    reschedule.shared = True
+    return reschedule
+
+
 class ItineraryEntry:
     """Entry to insert into an Itinerary.
 
@@ -27,18 +57,80 @@ class ItineraryEntry:
     long to stay. It also has a rescheduling function to continuously
     keep the persons itinerary filled.
 
+    The times are stored as integer seconds since the epoch in go_s
+    and leave_s, so the itinerary compares them without datetime
+    arithmetic.
+
+    The same entry is often added to the itineraries of many persons,
+    e.g. everybody working at a place. They all reschedule it at the
+    same time. If reschedule is marked with shared_reschedule, the
+    result is remembered and handed to the others by rescheduled_at,
+    and the persons keep sharing the new entry.
+
+    The persons only look at their itinerary when it says something
+    may change. Changing go_when or leave_when of an entry therefore
+    makes all persons of the model look again at the next step, as the
+    entry does not know whose itineraries hold it.
+
     Arguments:
     location -- the Location the person is sent to
     go_when -- the time the person should go to the location
     leave_when -- the amount of time the person should stay
     """
+    __slots__ = ('location', 'go_s', 'leave_s', '_rescheduled',
+                 '__weakref__')
+
     def __init__(self, location: Location, go_when: datetime, leave_when: datetime):
         self.location = location
-        self.go_when = go_when
-        self.leave_when = leave_when
+        # The times are kept as seconds since the epoch, go_when and
+        # leave_when convert them on the way in and out.
+        self.go_s = to_seconds(go_when)
+        self.leave_s = to_seconds(leave_when)
+        self._rescheduled = None
+
+    @classmethod
+    def from_seconds(cls, location: Location, go_s: int, leave_s: int):
+        """Create an entry from times in seconds since the epoch."""
+        entry = cls.__new__(cls)
+        entry.location = location
+        entry.go_s = go_s
+        entry.leave_s = leave_s
+        entry._rescheduled = None
+        return entry
+
+    def _copy_at(self, go_s: int, leave_s: int):
+        """Create a copy of this entry with other times, for reschedule.
+
+        As with copy(), the entry keeps its class, and the attributes of
+        subclasses without slots are carried over. The reschedule cache
+        is not.
+        """
+        entry = self.from_seconds(self.location, go_s, leave_s)
+        attributes = getattr(self, '__dict__', None)
+        if attributes:
+            entry.__dict__.update(attributes)
+        return entry
+
+    @property
+    def go_when(self) -> datetime:
+        return from_seconds(self.go_s)
+
+    @go_when.setter
+    def go_when(self, value: datetime):
+        self.go_s = to_seconds(value)
+        self.location.model.population.itineraries_changed()
+
+    @property
+    def leave_when(self) -> datetime:
+        return from_seconds(self.leave_s)
+
+    @leave_when.setter
+    def leave_when(self, value: datetime):
+        self.leave_s = to_seconds(value)
+        self.location.model.population.itineraries_changed()
 
     def __lt__(self, other):
-        return self.go_when < other.go_when
+        return self.go_s < other.go_s
 
     def reschedule(self, current_time: datetime):
         """Reschedules a new appointment on the itinerary
@@ -48,41 +140,106 @@ class ItineraryEntry:
         """
         return None
 
+    def rescheduled_at(self, current_time: datetime, at_s: int):
+        """Get reschedule(current_time), reusing the last result.
+
+        The result is reused when asked again at the same time, as long
+        as the times of this entry are unchanged and another itinerary
+        still holds the result. It is only referenced weakly, so a
+        recurring entry does not keep all of its successors alive.
+        Only a reschedule marked with shared_reschedule is reused,
+        others are called every time.
+        """
+        if not getattr(type(self).reschedule, 'shared', False):
+            return self.reschedule(current_time)
+        cached = getattr(self, '_rescheduled', None)
+        if cached is not None and cached[:3] == (at_s, self.go_s, self.leave_s):
+            new_entry = cached[3]()
+            if new_entry is not None:
+                return new_entry
+        new_entry = self.reschedule(current_time)
+        if new_entry is not None:
+            self._rescheduled = (at_s, self.go_s, self.leave_s,
+                                 weakref.ref(new_entry))
+        return new_entry
+
 
 class Itinerary:
-    """Holds the weekly itinerary for a person."""
+    """Holds the weekly itinerary for a person.
+
+    The entries are kept in a binary heap of (go_s, order, entry)
+    tuples, keyed on the start time of the entry in seconds since
+    the epoch, so the next relevant entry is always at the top
+    and the heap only compares integers. The order is a running
+    count, which breaks ties in the order the entries were added,
+    without comparing the entries themselves.
 
-    def __init__(self):
+    Arguments:
+        on_change -- optional function called without arguments
+                     when an entry is added
+    """
+
+    __slots__ = ('the_itinerary', 'on_change', '_order')
+
+    def __init__(self, on_change=None):
         self.the_itinerary = []
+        self.on_change = on_change
+        self._order = count()
 
     def add_entry(self, new_entry: ItineraryEntry):
         """Add a new entry on the itinerary.
 
-        The entry is sorting-inserted into the itinerary according
-        to the start time of the entries, so that the next relevant
-        entry is always first in the list.
+        The entry is pushed onto the heap according to the start
+        time of the entries, so that the next relevant entry is
+        always first in the list.
         """
-        insort(self.the_itinerary, new_entry)
+        heapq.heappush(self.the_itinerary,
+                       (new_entry.go_s, next(self._order), new_entry))
+        if self.on_change is not None:
+            self.on_change()
+
+    def next_change(self, at_s: int):
+        """Get the time at which get_location may answer differently.
 
-    def get_location(self, at_time: datetime):
+        Call this after get_location at the time at_s, in seconds since
+        the epoch. The answer only changes when the first entry starts
+        or ends, so until then there is no need to ask again. The time
+        is returned in seconds, or None if the itinerary is empty.
+        """
+        if len(self.the_itinerary) == 0:
+            return None
+        entry = self.the_itinerary[0][2]
+        if entry.go_s > at_s:
+            return entry.go_s
+        return entry.leave_s
+
+    def get_location(self, at_time: datetime, at_s=None):
         """Get the next location on the itinerary.
 
         If there is no active next location in the itinerary,
         the function returns None, meaning that the Person should
         go to their default location (probably home).
+
+        Arguments:
+        at_time -- the current time
+        at_s -- the current time in seconds since the epoch, if known
         """
+        if at_s is None:
+            at_s = to_seconds(at_time)
         while len(self.the_itinerary) > 0:
+            entry = self.the_itinerary[0][2]
             # If there is an item but it is not time yet, go home.
-            if self.the_itinerary[0].go_when > at_time:
+            if entry.go_s > at_s:
                 return None
             # If it is time and it's not yet time to go home, go to location.
-            if self.the_itinerary[0].go_when <= at_time < self.the_itinerary[0].leave_when:
-                return self.the_itinerary[0].location
-            # Time is up, delete the item and add a rescheduled one, check the itinerary again.
-            if self.the_itinerary[0].leave_when <= at_time:
-                new_entry = self.the_itinerary[0].reschedule(at_time)
-                del self.the_itinerary[0]
-                if new_entry is not None:
-                    self.add_entry(new_entry)
+            if at_s < entry.leave_s:
+                return entry.location
+            # Time is up, replace the item with a rescheduled one, check the itinerary again.
+            new_entry = entry.rescheduled_at(at_time, at_s)
+            if new_entry is None:
+                heapq.heappop(self.the_itinerary)
+            else:
+                heapq.heapreplace(self.the_itinerary,
+                                  (new_entry.go_s, next(self._order), new_entry))
         # If there is no items, go home
-        return None
\ No newline at end of file
+        return None
@@ -16,21 +16,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from copy import copy
-from typing import Tuple
-from datetime import date, datetime, time, timedelta
+from datetime import datetime
 from epidexus import Location, ItineraryEntry
+from epidexus.itinerary import shared_reschedule
+
+_ONE_DAY_S = 24 * 60 * 60
 
 
 class DailyItineraryEntry (ItineraryEntry):
     """A schedule that repeats every day."""
 
+    __slots__ = ()
+
     def __init__(self, location: Location,
                  go_when: datetime, leave_when: datetime):
         super().__init__(location, go_when, leave_when)
 
+    @shared_reschedule
     def reschedule(self, current_time: datetime):
-        new_entry = copy(self)
-        new_entry.go_when = self.go_when + timedelta(days=1)
-        new_entry.leave_when = self.leave_when + timedelta(days=1)
-        return new_entry
+        return self._copy_at(self.go_s + _ONE_DAY_S,
+                             self.leave_s + _ONE_DAY_S)
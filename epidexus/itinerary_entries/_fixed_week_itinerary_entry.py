@@ -16,10 +16,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from copy import copy
 from typing import Tuple
 from datetime import date, datetime, time, timedelta
 from epidexus import Location, ItineraryEntry
+from epidexus.itinerary import shared_reschedule, to_seconds
+
+_ONE_DAY_S = 24 * 60 * 60
+# The epoch, 1970-01-01, was a Thursday.
+_EPOCH_WEEKDAY = 3
+
+
+def _seconds_of_day(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
 
 
 class FixedWeekItineraryEntry (ItineraryEntry):
@@ -32,8 +40,15 @@ class FixedWeekItineraryEntry (ItineraryEntry):
 
     Caution: The class does not check if the start date is in the past.
     It will happily place an itinerary entry in the past.
+
+    The schedule is unpacked into lookup tables by weekday when the
+    entry is made: the number of days to the next scheduled day, and
+    the come and go hours in seconds. The rescheduled entries share
+    these, so rescheduling is a few integer operations.
     """
 
+    __slots__ = ('_week_schedule', '_days_ahead', '_come_s', '_leave_s')
+
     def __init__(self, location: Location, start_date: date,
                  monday: Tuple[time, time] = None,
                  tuesday: Tuple[time, time] = None,
@@ -48,6 +63,15 @@ class FixedWeekItineraryEntry (ItineraryEntry):
         if all(d is None for d in self._week_schedule):
             raise Exception("No come and go hours were defined.")
 
+        # Days from each weekday to the next day with hours set.
+        self._days_ahead = [next(k for k in range(7)
+                                 if self._week_schedule[(d + k) % 7] is not None)
+                            for d in range(7)]
+        self._come_s = [None if h is None else _seconds_of_day(h[0])
+                        for h in self._week_schedule]
+        self._leave_s = [None if h is None else _seconds_of_day(h[1])
+                         for h in self._week_schedule]
+
         valid_start_date = self.__next_valid_date(start_date)
         hours = self._week_schedule[valid_start_date.weekday()]
         # Minus operator is not available on time only datetime, so we'll convert
@@ -65,16 +89,24 @@ class FixedWeekItineraryEntry (ItineraryEntry):
             if self._week_schedule[(from_date.weekday()+d) % 7] is not None:
                 return from_date + timedelta(days=d)
 
+    @shared_reschedule
     def reschedule(self, current_time: datetime):
-        new_entry = copy(self)
-        next_day = self.__next_valid_date(current_time.date())
+        now_s = to_seconds(current_time)
+        day_s = now_s - now_s % _ONE_DAY_S
+        weekday = (day_s // _ONE_DAY_S + _EPOCH_WEEKDAY) % 7
+        days = self._days_ahead[weekday]
+        next_weekday = (weekday + days) % 7
         # If the next day is the current day and the come hours has passed,
         # then we will search on from tomorrow.
-        if datetime.combine(next_day, self._week_schedule[next_day.weekday()][0]) < current_time:
-            next_day = self.__next_valid_date(
-                current_time.date() + timedelta(days=1))
+        if day_s + days * _ONE_DAY_S + self._come_s[next_weekday] < now_s:
+            days = 1 + self._days_ahead[(weekday + 1) % 7]
+            next_weekday = (weekday + days) % 7
 
-        hours = self._week_schedule[next_day.weekday()]
-        new_entry.go_when = datetime.combine(next_day, hours[0])
-        new_entry.leave_when = datetime.combine(next_day, hours[1])
+        next_day_s = day_s + days * _ONE_DAY_S
+        new_entry = self._copy_at(next_day_s + self._come_s[next_weekday],
+                                  next_day_s + self._leave_s[next_weekday])
+        new_entry._week_schedule = self._week_schedule
+        new_entry._days_ahead = self._days_ahead
+        new_entry._come_s = self._come_s
+        new_entry._leave_s = self._leave_s
         return new_entry
@@ -17,8 +17,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import numpy as np
-import numpy.random
-from functools import reduce
 from mesa import Agent
 from .model import EpidexusModel
 
@@ -28,9 +26,14 @@ class Location(Agent):
     Together with Person, this is one of the main classes
     in this simulation.
 
-    It inherits Agent, in that the Location-Agents are drivers
-    for evaluating infections. Person-Agents are drivers in moving
-    persons between locations.
+    It inherits Agent to be part of the model. Infections are
+    evaluated for all locations at once by the model, using the
+    infection rates kept in the model's PopulationArrays. Only
+    locations added to the model take part in this. Person-Agents
+    are drivers in moving persons between locations.
+
+    The persons present are recorded by their index into the
+    population arrays, in an int32 array that grows by doubling.
 
     Arguments:
         model: The simulation model running the show.
@@ -40,22 +43,39 @@ class Location(Agent):
                         rate/day.
     """
 
+    __slots__ = ('access_policy', '_check_policy', 'name', '_members',
+                 '_num_members', 'loc_id')
+
     def __init__(self, model: EpidexusModel, name="", infection_rate=0.0):
-        # Initially, everybody is allowed in.
+        # Initially, everybody is allowed in, so there is no policy to check.
         super().__init__(model.next_id(), model)
-        self.access_policy = lambda person: True
+        self.access_policy = None
+        self._check_policy = False
         self.name = name
-        self.persons_here = []
-        self.infection_rate = infection_rate
+        self._members = np.empty(4, dtype=np.int32)
+        self._num_members = 0
         self.model = model
+        self.loc_id = model.population.add_location(self)
+        self.infection_rate = infection_rate
 
     @property
     def infection_rate(self):
-        return self._beta_per_s * 86400
+        return self.model.population.loc_beta_per_s[self.loc_id] * 86400
 
     @infection_rate.setter
     def infection_rate(self, value):
-        self._beta_per_s = value/86400
+        self.model.population.loc_beta_per_s[self.loc_id] = value/86400
+
+    @property
+    def persons_here(self):
+        """List of the persons at this location."""
+        persons = self.model.population.persons
+        return [persons[i] for i in self._members[:self._num_members]]
+
+    @property
+    def member_indices(self):
+        """Population indices of the persons at this location (a view)."""
+        return self._members[:self._num_members]
 
     def __str__(self):
         return ("Location id: {}, name: {}".format(self.unique_id, self.name))
@@ -67,9 +87,14 @@ class Location(Agent):
         Arguments:
             policy: function taking a person as parameter,
                     returning true if they are allowed to
-                    enter the location.
+                    enter the location. None lets everybody in.
         """
         self.access_policy = policy
+        self._check_policy = policy is not None
+
+    def admits(self, person) -> bool:
+        """Tells if the access policy lets the person in."""
+        return not self._check_policy or self.access_policy(person)
 
     def go_here(self, person) -> bool:
         """Registers an agent at this location.
@@ -78,25 +103,33 @@ class Location(Agent):
         not allowed to come in and must relocate
         itself.
         """
-        is_person_allowed = self.access_policy(person)
-        if is_person_allowed:
-            self.persons_here.append(person)
-        return is_person_allowed
+        if not self.admits(person):
+            return False
+        self.arrive(person)
+        return True
+
+    def arrive(self, person) -> None:
+        """Registers a person without checking the access policy.
+
+        The slot of the person in the members array is recorded in the
+        population, so leave_here can find it without searching.
+        """
+        if self._num_members == len(self._members):
+            members = np.empty(2 * len(self._members), dtype=np.int32)
+            members[:self._num_members] = self._members
+            self._members = members
+        self._members[self._num_members] = person._index
+        self.model.population.location_slot[person._index] = self._num_members
+        self._num_members += 1
 
     def leave_here(self, person) -> None:
-        """Unregisters a person at the location."""
-        self.persons_here.remove(person)
-
-
-    def step(self):
-        """Infections are evaluated in the step function."""
-        num_infectious_people = reduce(lambda x,p: x+1 if p.infection_state.is_infected() else x,
-                                       self.persons_here, 0)
-        if num_infectious_people == 0:
-            return
-
-        prob_of_no_infection = np.exp(- self.model.sim_time_step.seconds * self._beta_per_s * num_infectious_people/len(self.persons_here))
-        for p in self.persons_here:
-            if (p.infection_state.is_suceptible()
-                    and numpy.random.uniform() > prob_of_no_infection):
-                p.infect()
+        """Unregisters a person at the location.
+
+        The last member is moved into the slot of the leaving person.
+        """
+        slot_of = self.model.population.location_slot
+        slot = slot_of[person._index]
+        self._num_members -= 1
+        last = self._members[self._num_members]
+        self._members[slot] = last
+        slot_of[last] = slot
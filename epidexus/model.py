@@ -15,88 +15,336 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from copy import copy
 from datetime import datetime, timedelta
 from mesa import Agent, Model
-from mesa.time import SimultaneousActivation
-from mesa.datacollection import DataCollector
 import logging
+import numpy as np
 from typing import List
+from .infectionstate import _S, _I
+from .population import (MOVE_NEVER, TRANSITION_NEVER, TRANSITION_NOW,
+                         PopulationArrays)
+from .history import SEIRHistory
+from ._kernels import count_at_locations, update_seir
+
+logger = logging.getLogger(__name__)
+
+# No persons, as population indices.
+_NOBODY = np.empty(0, dtype=np.intp)
 
 
 class EpidexusModel(Model):
     """The main simulation model.
 
     This is the entry point for MESA-based simulations.
+
+    The state of the persons is kept in a PopulationArrays, so that
+    infections can be evaluated for the whole population at once.
+    The agents only take care of moving the persons around, and
+    only the persons due to move, according to their itineraries,
+    are advanced in a step. The model schedules them itself, from
+    the persons and locations lists, rather than through a MESA
+    scheduler.
+
+    Time is counted in steps, current_tick, from the start date.
+    The current date is derived from it once per step.
+
+    Arguments:
+        start_date: The date and time the simulation starts at.
+        sim_time_step: The simulated time per step.
+        seed: Seed for the random number generator, rng.
+        incubation_time: Time from exposure until a person is infectious.
+        recovering_time: Time from being infectious until recovered.
     """
-    def __init__(self, start_date: datetime, sim_time_step=timedelta(minutes=15)):
+    def __init__(self, start_date: datetime, sim_time_step=timedelta(minutes=15),
+                 seed=None, incubation_time=timedelta(days=4),
+                 recovering_time=timedelta(days=10)):
         super().__init__()
-        self.schedule = SimultaneousActivation(self)
-        self.current_date = start_date
+        self.start_date = start_date
         self.sim_time_step = sim_time_step
+        self.current_tick = 0
+        self._current_date = start_date
+        self._step_s = int(sim_time_step.total_seconds())
+        self._start_s = int(np.datetime64(start_date, 's').astype(np.int64))
+        # Seconds from midnight on the start date, for spotting new days.
+        self._start_day_s = self._start_s % 86400
+        self._last_day = 0
+        self.rng = np.random.default_rng(seed)
+        self.population = PopulationArrays(incubation_time, recovering_time)
 
-        self.datacollector = DataCollector(model_reporters={"Date": self.report_current_date,
-                                                            "S": self.report_s,
-                                                            "E": self.report_e,
-                                                            "I": self.report_i,
-                                                            "R": self.report_r})
-        self.seir_counts = [0, 0, 0, 0]
+        self.datacollector = SEIRHistory()
         self.persons = []
         self.locations =[]
 
-        logging.basicConfig(filename='debug.log',level=logging.DEBUG)
-        logging.info("-- Started Epidexus Simulation --")
-        logging.info("Current date: " + str(self.current_date))
-        logging.info("Simulation time step: " + str(self.sim_time_step))
-        logging.info("---------------------------------")
+        logging.basicConfig(filename='debug.log', level=logging.WARNING)
+        logger.info("-- Started Epidexus Simulation --")
+        logger.info("Current date: %s", self.current_date)
+        logger.info("Simulation time step: %s", self.sim_time_step)
+        logger.info("---------------------------------")
+
+    @property
+    def current_date(self) -> datetime:
+        return self._current_date
+
+    @property
+    def current_s(self) -> int:
+        """The current time in seconds since the epoch."""
+        return self._start_s + self.current_tick * self._step_s
 
     def step(self):
-        last_date = copy(self.current_date)
-        self.current_date = self.current_date + self.sim_time_step
+        self.current_tick += 1
+        self._current_date = self.start_date + self.current_tick * self.sim_time_step
 
         # Report SEIR only once a day
-        if self.current_date.date() > last_date.date():
-            self.count_seir()
+        day = (self._start_day_s + self.current_tick * self._step_s) // 86400
+        if day != self._last_day:
+            self._last_day = day
             self.datacollector.collect(self)
 
-        self.schedule.step()
+        pop = self.population
+        self.advance_persons(
+            np.flatnonzero(pop.next_move_s[:pop.size] <= self.current_s))
+        self._update_seir()
+
+    def run(self, num_steps: int) -> None:
+        """Runs the model for num_steps steps.
+
+        This gives the same result as calling step num_steps times, but
+        while nobody can get exposed, because nobody is infected or
+        nobody is susceptible, the steps until the next move, onset or
+        recovery are skipped at once. Only their daily records are
+        written, e.g. for the rest of the run after an epidemic has
+        died out. This is only done when all persons are added to the
+        model, so the counts cover everybody.
+        """
+        self.prepare_history(num_steps)
+        end_tick = self.current_tick + num_steps
+        pop = self.population
+        counts = pop.seir_counts
+        while self.current_tick < end_tick:
+            if ((counts[_I] == 0 or counts[_S] == 0)
+                    and counts.sum() == pop.size):
+                self._skip_idle_steps(end_tick)
+            if self.current_tick < end_tick:
+                self.step()
+
+    def _skip_idle_steps(self, end_tick):
+        """Skips the steps, up to end_tick, in which nothing happens."""
+        pop = self.population
+        # The first tick at which somebody moves or changes state.
+        next_tick = end_tick + 1
+        if pop.size > 0:
+            next_move_s = int(pop.next_move_s[:pop.size].min())
+            if next_move_s != MOVE_NEVER:
+                next_tick = min(next_tick,
+                                -((self._start_s - next_move_s) // self._step_s))
+        if pop.next_transition_s != TRANSITION_NEVER:
+            next_tick = min(next_tick,
+                            (int(pop.next_transition_s) - self._start_s)
+                            // self._step_s + 1)
+        last_idle = min(next_tick - 1, end_tick)
+        if last_idle <= self.current_tick:
+            return
+
+        # Record each day started in the skipped steps, at its first step,
+        # as step would.
+        last_day = (self._start_day_s + last_idle * self._step_s) // 86400
+        for day in range(self._last_day + 1, last_day + 1):
+            self.current_tick = -((self._start_day_s - day * 86400)
+                                  // self._step_s)
+            self._current_date = (self.start_date
+                                  + self.current_tick * self.sim_time_step)
+            self._last_day = day
+            self.datacollector.collect(self)
+        self.current_tick = last_idle
+        self._current_date = self.start_date + last_idle * self.sim_time_step
+
+    def advance_persons(self, due):
+        """Moves the given persons according to their itineraries.
+
+        This is done in phases. The itinerary of each person is asked
+        where to be now and when that may change. Those without a place
+        to go are sent home, and the persons who are already where they
+        should be are left out, in a vectorized pass over the arrays.
+        The rest then move in order, one at a time, as the access policy
+        of a location may depend on who has arrived before them. Persons
+        who are turned away try again at the next step.
+
+        Arguments:
+            due: Indices of the persons to move, in increasing order.
+        """
+        if len(due) == 0:
+            return
+        pop = self.population
+        persons = pop.persons
+        locations = pop.locations
+        current_date = self._current_date
+        current_s = self.current_s
+
+        scheduled = np.empty(len(due), dtype=np.int32)
+        next_move_s = np.empty(len(due), dtype=np.int64)
+        # Python ints index the list faster than NumPy scalars.
+        for j, i in enumerate(due.tolist()):
+            itinerary = persons[i].itinerary
+            location = itinerary.get_location(current_date, current_s)
+            scheduled[j] = -1 if location is None else location.loc_id
+            next_change = itinerary.next_change(current_s)
+            next_move_s[j] = MOVE_NEVER if next_change is None else next_change
+        scheduled = np.where(scheduled < 0, pop.home_id[due], scheduled)
+        pop.next_move_s[due] = next_move_s
+
+        moving = scheduled != pop.location_id[due]
+        location_id = pop.location_id
+        for i, new_id in zip(due[moving].tolist(), scheduled[moving].tolist()):
+            person = persons[i]
+            new_location = locations[new_id]
+            if new_location.admits(person):
+                locations[location_id[i]].leave_here(person)
+                new_location.arrive(person)
+                location_id[i] = new_id
+            else:
+                pop.next_move_s[i] = current_s
+
+    def prepare_history(self, num_steps: int) -> None:
+        """Preallocates the history for the next num_steps steps.
+
+        The SEIR counts are recorded once a day, so this makes room for
+        a record per day started in the coming steps.
+        """
+        end_day = (self._start_day_s
+                   + (self.current_tick + num_steps) * self._step_s) // 86400
+        self.datacollector.reserve(end_day - self._last_day)
+
+    def _update_seir(self):
+        """Advances the infection state of the whole population.
+
+        The number of infected, susceptible and present persons at each
+        location is counted in one pass by the count_at_locations kernel.
+        When there is only one location, they are taken from the totals
+        instead. Nothing is counted when nobody is infected.
+
+        The counts give the probability of being infected at the
+        locations with infected persons. It is computed as -expm1(-x)
+        rather than 1 - exp(-x), which keeps its precision when the rate
+        is small and the probability is close to zero.
+
+        The number of exposures at each of these locations is drawn from
+        a binomial distribution over its susceptible persons, in one
+        batch, and only where there are any are the exposed picked at
+        random among them. This is equivalent to a draw per person, but
+        most locations draw none. The update_seir kernel then makes the
+        state transitions of all persons in a single pass.
+        """
+        pop = self.population
+        state = pop.seir_state[:pop.size]
+        num_locations = pop.num_locations
+
+        exposed = _NOBODY
+        # The totals only cover the persons added to the model, those
+        # not added can be infected too.
+        all_counted = pop.seir_counts.sum() == pop.size
+        if pop.seir_counts[_I] > 0 or not all_counted:
+            if num_locations == 1 and all_counted:
+                # Everybody is at the only location, so there is nothing
+                # to count, e.g. in the OneLocation scenario.
+                num_infected = pop.seir_counts[_I:_I + 1]
+                num_susceptible = pop.seir_counts[_S:_S + 1]
+                num_present = np.array([pop.size])
+            else:
+                num_infected, num_susceptible, num_present = \
+                    count_at_locations(state, pop.location_id[:pop.size],
+                                       num_locations)
+            # Only locations added to the model spread the disease, and
+            # only the ones with infected and susceptible persons need
+            # evaluating.
+            spreading = np.flatnonzero(num_infected
+                                       * num_susceptible
+                                       * pop.loc_beta_per_s[:num_locations]
+                                       * pop.loc_scheduled[:num_locations])
+            if len(spreading) > 0:
+                prob_of_infection = -np.expm1(
+                    - self._step_s
+                    * pop.loc_beta_per_s[spreading]
+                    * num_infected[spreading] / num_present[spreading])
+                num_exposed = self.rng.binomial(num_susceptible[spreading],
+                                                prob_of_infection)
+                hit = np.flatnonzero(num_exposed)
+                if len(hit) > 0:
+                    exposed = np.concatenate([
+                        self._pick_susceptible(location, count)
+                        for location, count in zip(spreading[hit].tolist(),
+                                                   num_exposed[hit].tolist())])
+        # Without anybody to expose, nothing happens until the next
+        # onset or recovery is due, so the pass over the persons can wait.
+        if len(exposed) == 0 and self.current_s <= pop.next_transition_s:
+            return
+
+        (newly_exposed, newly_infected, newly_recovered,
+         pop.next_transition_s) = update_seir(
+            state, pop.person_scheduled[:pop.size],
+            pop.infected_when[:pop.size].view(np.int64),
+            pop.onset_at[:pop.size].view(np.int64),
+            pop.recover_at[:pop.size].view(np.int64),
+            exposed, self.current_s,
+            pop.incubation_s, pop.recovering_s)
+        pop.seir_counts += (-newly_exposed, newly_exposed - newly_infected,
+                            newly_infected - newly_recovered, newly_recovered)
+
+    def _pick_susceptible(self, loc_id, count):
+        """Picks count susceptible persons at a location at random."""
+        pop = self.population
+        members = pop.locations[loc_id].member_indices
+        susceptible = members[pop.seir_state[members] == _S]
+        return self.rng.choice(susceptible, count, replace=False).astype(np.intp)
 
     def add_person(self, person: Agent):
-        self.schedule.add(person)
         self.persons.append(person)
-        logging.debug("Added person: " + str(person))
+        self.population.schedule_person(person._index)
+        logger.debug("Added person: %s", person)
 
     def add_location(self, location: Agent):
-        self.schedule.add(location)
         self.locations.append(location)
-        logging.debug("Added location: " + str(location))
+        self.population.loc_scheduled[location.loc_id] = True
+        logger.debug("Added location: %s", location)
 
     def add_locations(self, locations: List[Agent]):
         for l in locations:
             self.add_location(l)
 
+    @property
+    def seir_counts(self):
+        """The number of persons added to the model in each SEIR state.
+
+        The counts are kept up to date by the population as the
+        states change, so reading them is free.
+        """
+        return self.population.seir_counts
+
     def count_seir(self):
-        """Count the agents in each bin.
+        """Recount the persons in each bin.
 
-        Run this function before the report_x functions to update
-        the counts. This is to avoid iterating over all agent for
-        each of the four reporters.
+        The counts are maintained incrementally, so this is not
+        needed during the simulation. It rebuilds them from the
+        state array, e.g. after writing to it directly, and has the
+        transitions checked again at the next step. As at the daily
+        records, only the persons added to the model are counted.
         """
-        self.seir_counts = [0, 0, 0, 0]
-        for a in self.persons:
-            self.seir_counts[a.infection_state.seir.value] += 1
+        pop = self.population
+        state = pop.seir_state[:pop.size]
+        pop.seir_counts[:] = np.bincount(
+            state[pop.person_scheduled[:pop.size]], minlength=4)
+        pop.next_transition_s = TRANSITION_NOW
 
     def report_s(self, model):
-        return self.seir_counts[0]
+        return int(self.seir_counts[0])
 
     def report_e(self, model):
-        return self.seir_counts[1]
+        return int(self.seir_counts[1])
 
     def report_i(self, model):
-        return self.seir_counts[2]
+        return int(self.seir_counts[2])
 
     def report_r(self, model):
-        return self.seir_counts[3]
+        return int(self.seir_counts[3])
 
     def report_current_date(self, model):
         return self.current_date
\ No newline at end of file
@@ -16,11 +16,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from datetime import datetime
 from enum import Enum
+import numpy as np
 from mesa import Agent
-import numpy.random
 from .model import EpidexusModel
-from .infectionstate import InfectionState, SEIR
+from .infectionstate import InfectionState, SEIR, _S, _E
 from .itinerary import Itinerary
 from .location import Location
 
@@ -35,47 +36,126 @@ class Gender(Enum):
 
 
 class Person(Agent):
-    """The main character in this simulation."""
+    """The main character in this simulation.
+
+    The infection state, age and gender are read and written directly
+    in the model's population arrays through properties.
+    The infection_state attribute gives an InfectionState view of the
+    same entries.
+    """
+
+    __slots__ = ('itinerary', 'home_location', '_index')
 
     def __init__(self, model: EpidexusModel,
                  home_location: Location, seir=SEIR.SUSCEPTIBLE,
                  age=0, gender=Gender.UNKNOWN):
         super().__init__(model.next_id(), model)
 
-        self.age = age
-        self.gender = gender
-
-        self.itinerary = Itinerary()
-
-        # SEIR(D)
-        self.infection_state = InfectionState(seir)
-
-        # Setup home location
-        self.home_location = home_location
-        if not home_location.go_here(self):
-            raise Exception("Home location is not available initially.")
-        self.current_location = home_location
+        # The infection state, whereabouts, age and gender are kept in the
+        # model's population arrays, the person knows its index into them.
+        self._index = model.population.add_person(self, seir.value,
+                                                  home_location.loc_id,
+                                                  model.current_s)
+        # A person who cannot be set up, e.g. because the home does not
+        # let them in, is not left behind in the population.
+        try:
+            self.age = age
+            self.gender = gender
+
+            # The itinerary exists before the person is placed at home,
+            # so the access policy of the home can look at it.
+            self.itinerary = Itinerary(on_change=self.__itinerary_changed)
+
+            # Setup home location
+            self.home_location = home_location
+            if not home_location.go_here(self):
+                raise Exception("Home location is not available initially.")
+        except BaseException:
+            model.population.remove_last_person()
+            raise
+
+    @property
+    def age(self):
+        # Whole ages are given back as ints, as they were usually set.
+        age = float(self.model.population.age[self._index])
+        return int(age) if age.is_integer() else age
+
+    @age.setter
+    def age(self, value: float):
+        self.model.population.age[self._index] = value
+
+    @property
+    def gender(self) -> Gender:
+        return Gender(self.model.population.gender[self._index])
+
+    @gender.setter
+    def gender(self, value: Gender):
+        self.model.population.gender[self._index] = value.value
+
+    @property
+    def infection_state(self) -> InfectionState:
+        return InfectionState(self.model, self._index)
+
+    @property
+    def seir(self) -> SEIR:
+        return SEIR(self.model.population.seir_state[self._index])
+
+    @seir.setter
+    def seir(self, value: SEIR):
+        self.model.population.set_seir(self._index, value.value,
+                                       self.model.current_s)
+
+    @property
+    def seir_int(self) -> int:
+        """The SEIR state as its plain integer code, without the Enum."""
+        return int(self.model.population.seir_state[self._index])
+
+    @property
+    def infected_when(self):
+        when = self.model.population.infected_when[self._index]
+        if np.isnat(when):
+            return None
+        return when.astype(datetime)
+
+    @property
+    def current_location(self) -> Location:
+        population = self.model.population
+        return population.locations[population.location_id[self._index]]
+
+    @current_location.setter
+    def current_location(self, location: Location):
+        """Moves the person to the location, without asking its policy.
+
+        The person looks at their itinerary again at the next step, as
+        they would have when every person was advanced each step.
+        """
+        current_location = self.current_location
+        if location is not current_location:
+            current_location.leave_here(self)
+            location.arrive(self)
+            population = self.model.population
+            population.location_id[self._index] = location.loc_id
+            population.itinerary_changed(self._index)
 
     def __str__(self):
-        return ("Person id: {}, age: {}, gender: {}, infection state: {}".format(self.unique_id, self.age, self.gender, self.infection_state))
+        return ("Person id: {}, age: {}, gender: {}, infection state: {}".format(self.unique_id, self.age, self.gender, self.seir.name.capitalize()))
 
-    def infect(self):
-        self.infection_state.infect(self.model.current_date)
+    def infect(self) -> bool:
+        population = self.model.population
+        if population.seir_state[self._index] == _S:
+            population.set_seir(self._index, _E, self.model.current_s)
+            return True
+        return False
 
     def advance(self):
-        """The agent moves in the advance function."""
-        self.infection_state.update(self.model.current_date) # Internal inf. state is updated before moving.
-
-        scheduled_location = self.itinerary.get_location(
-            self.model.current_date)
-        if scheduled_location is None:  # If there is no place to go; go home.
-            self.__change_location(self.home_location)
-        else:
-            self.__change_location(scheduled_location)
-
-    def __change_location(self, new_location):
-        """Changes location of the agent."""
-        if new_location is not self.current_location:
-            if new_location.go_here(self):
-                self.current_location.leave_here(self)
-                self.current_location = new_location
+        """The agent moves in the advance function.
+
+        The model moves all persons due to move in a batch, with
+        advance_persons. This does the same for this person alone.
+        The infection state is advanced by the model for all persons
+        at once.
+        """
+        self.model.advance_persons(np.array([self._index]))
+
+    def __itinerary_changed(self):
+        self.model.population.itinerary_changed(self._index)
@@ -1,9 +1,10 @@
-import matplotlib.pyplot as plt
 from .model import EpidexusModel
 
 
 def seir_stackplot(sim_model: EpidexusModel, ax=None):
-    seir = sim_model.datacollector.get_model_vars_dataframe()
+    # matplotlib is slow to import, so it is only imported when plotting.
+    import matplotlib.pyplot as plt
+    seir = sim_model.datacollector.model_vars
     if ax is None:
         fig, ax = plt.subplots()
         fig.autofmt_xdate()
@@ -17,7 +18,8 @@ def seir_stackplot(sim_model: EpidexusModel, ax=None):
     return fig, ax
 
 def infected_plot(sim_model: EpidexusModel, ax=None):
-    seir = sim_model.datacollector.get_model_vars_dataframe()
+    import matplotlib.pyplot as plt
+    seir = sim_model.datacollector.model_vars
     if ax is None:
         fig, ax = plt.subplots()
         fig.autofmt_xdate()
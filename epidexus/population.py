@@ -0,0 +1,239 @@
+# Epidexus - Agent Based Location-Graph Epidemic Simulation
+# Population - Structure-of-arrays storage of the persons and locations
+#
+# Copyright (C) 2020  Karl D. Hansen, Aalborg University <kdh@es.aau.dk>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from datetime import timedelta
+from .infectionstate import _E, _I
+
+
+# Values of next_move_s for persons who must move at the next step,
+# and for persons who have nowhere to go (or are not scheduled).
+MOVE_NOW = np.iinfo(np.int64).min
+MOVE_NEVER = np.iinfo(np.int64).max
+
+# Values of next_transition_s when the infection states must be checked
+# at the next step, and when no onset or recovery is pending.
+TRANSITION_NOW = np.iinfo(np.int64).min
+TRANSITION_NEVER = np.iinfo(np.int64).max
+
+
+def _grow(array, capacity, fill=0):
+    """Return a copy of array enlarged to capacity, padded with fill."""
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class PopulationArrays:
+    """Holds the state of all persons and locations as NumPy arrays.
+
+    Instead of letting every Person carry its own attributes, the
+    state needed for evaluating infections, and the age and gender
+    of the persons, are stored column-wise here, so the model can
+    treat the whole population in a single vectorized pass. Persons
+    and locations are identified by their index into these arrays.
+
+    The arrays are over-allocated and grown by doubling, so only
+    the first size (or num_locations) entries are valid.
+
+    The number of persons in each SEIR state is kept up to date in
+    seir_counts as the states change, so it never needs recounting.
+    As with the persons list of the model, only the persons added to
+    the model (person_scheduled) are counted, and only their infection
+    state moves on by itself. The others can still be exposed and pass
+    on the disease where they are, but stay in their state.
+
+    The persons only need to move when their itinerary says so. The
+    time of their next move, in seconds, is kept in next_move_s, so the
+    model can pick the persons due to move without visiting the others.
+    persons holds the Person objects by index for this.
+
+    When a person is exposed, the absolute times of the onset of
+    the disease and of the recovery are computed once and stored
+    in onset_at and recover_at, so advancing the state only takes
+    two comparisons per person. The earliest of these times is kept
+    in next_transition_s, so the model can skip the update while no
+    transition is due and nobody can get exposed. Any change to the
+    infection state from outside the model sets it to TRANSITION_NOW. A
+    person put in the exposed or infected state from outside gets their
+    deadlines counted from the time given, so they never go without.
+
+    Arguments:
+        incubation_time: Time from exposure until a person is infectious.
+        recovering_time: Time from being infectious until recovered.
+        capacity: The initial number of persons and locations
+                  to allocate room for.
+    """
+
+    def __init__(self, incubation_time=timedelta(days=4),
+                 recovering_time=timedelta(days=10), capacity=64):
+        self.incubation_s = int(incubation_time.total_seconds())
+        self.recovering_s = int(recovering_time.total_seconds())
+        # Offsets from exposure to the deadlines, for set_infected_when.
+        self._until_onset = np.timedelta64(self.incubation_s, 's')
+        self._until_recovery = np.timedelta64(
+            self.incubation_s + self.recovering_s, 's')
+
+        self.size = 0
+        self.seir_counts = np.zeros(4, dtype=np.int64)
+        self.next_transition_s = TRANSITION_NOW
+        self.seir_state = np.zeros(capacity, dtype=np.int8)
+        self.infected_when = np.full(capacity, np.datetime64('NaT'),
+                                     dtype='datetime64[s]')
+        self.onset_at = np.full(capacity, np.datetime64('NaT'),
+                                dtype='datetime64[s]')
+        self.recover_at = np.full(capacity, np.datetime64('NaT'),
+                                  dtype='datetime64[s]')
+        self.age = np.zeros(capacity, dtype=np.float64)
+        self.gender = np.zeros(capacity, dtype=np.int8)
+        self.location_id = np.zeros(capacity, dtype=np.int32)
+        self.home_id = np.zeros(capacity, dtype=np.int32)
+        self.location_slot = np.zeros(capacity, dtype=np.int32)
+        self.next_move_s = np.full(capacity, MOVE_NEVER, dtype=np.int64)
+        self.person_scheduled = np.zeros(capacity, dtype=np.bool_)
+        self.persons = []
+
+        self.locations = []
+        self.loc_beta_per_s = np.zeros(capacity, dtype=np.float64)
+        self.loc_scheduled = np.zeros(capacity, dtype=np.bool_)
+
+    @property
+    def num_locations(self) -> int:
+        return len(self.locations)
+
+    def add_person(self, person, seir: int, home_id: int, now_s: int) -> int:
+        """Allocates a person at their home and returns its index."""
+        if self.size == len(self.seir_state):
+            capacity = 2 * len(self.seir_state)
+            self.seir_state = _grow(self.seir_state, capacity)
+            self.infected_when = _grow(self.infected_when, capacity,
+                                       np.datetime64('NaT'))
+            self.onset_at = _grow(self.onset_at, capacity,
+                                  np.datetime64('NaT'))
+            self.recover_at = _grow(self.recover_at, capacity,
+                                    np.datetime64('NaT'))
+            self.age = _grow(self.age, capacity)
+            self.gender = _grow(self.gender, capacity)
+            self.location_id = _grow(self.location_id, capacity)
+            self.home_id = _grow(self.home_id, capacity)
+            self.location_slot = _grow(self.location_slot, capacity)
+            self.next_move_s = _grow(self.next_move_s, capacity, MOVE_NEVER)
+            self.person_scheduled = _grow(self.person_scheduled, capacity)
+        index = self.size
+        self.seir_state[index] = seir
+        self.location_id[index] = home_id
+        self.home_id[index] = home_id
+        if seir == _E or seir == _I:
+            self._start_infection(index, seir, now_s)
+        self.persons.append(person)
+        self.size += 1
+        return index
+
+    def remove_last_person(self) -> None:
+        """Undoes add_person for the person added last.
+
+        This is for a person who could not be created after all, e.g.
+        because their home did not let them in. Their entries are reset,
+        so the next person added starts from scratch.
+        """
+        self.size -= 1
+        index = self.size
+        if self.person_scheduled[index]:
+            self.seir_counts[self.seir_state[index]] -= 1
+            self.next_transition_s = TRANSITION_NOW
+        self.seir_state[index] = 0
+        self.infected_when[index] = np.datetime64('NaT')
+        self.onset_at[index] = np.datetime64('NaT')
+        self.recover_at[index] = np.datetime64('NaT')
+        self.age[index] = 0
+        self.gender[index] = 0
+        self.location_id[index] = 0
+        self.home_id[index] = 0
+        self.location_slot[index] = 0
+        self.next_move_s[index] = MOVE_NEVER
+        self.person_scheduled[index] = False
+        self.persons.pop()
+
+    def schedule_person(self, index) -> None:
+        """Lets a person move, starting at the next step.
+
+        From then on, the person is counted in seir_counts and their
+        infection state moves on.
+        """
+        if not self.person_scheduled[index]:
+            self.person_scheduled[index] = True
+            self.seir_counts[self.seir_state[index]] += 1
+            self.next_transition_s = TRANSITION_NOW
+        self.next_move_s[index] = MOVE_NOW
+
+    def itinerary_changed(self, index) -> None:
+        """Makes a scheduled person look at their itinerary next step."""
+        if self.person_scheduled[index]:
+            self.next_move_s[index] = MOVE_NOW
+
+    def itineraries_changed(self) -> None:
+        """Makes all scheduled persons look at their itinerary next step."""
+        next_move_s = self.next_move_s[:self.size]
+        next_move_s[self.person_scheduled[:self.size]] = MOVE_NOW
+
+    def set_seir(self, index, seir: int, now_s: int) -> None:
+        """Sets the SEIR state of a person, keeping the counts.
+
+        A person entering the exposed or infected state at now_s gets
+        their deadlines from it, see _start_infection.
+        """
+        previous = self.seir_state[index]
+        self.seir_state[index] = seir
+        if self.person_scheduled[index]:
+            self.seir_counts[previous] -= 1
+            self.seir_counts[seir] += 1
+            self.next_transition_s = TRANSITION_NOW
+        if seir != previous and (seir == _E or seir == _I):
+            self._start_infection(index, seir, now_s)
+
+    def _start_infection(self, index, seir: int, now_s: int) -> None:
+        """Sets the deadlines of a person entering E or I at now_s.
+
+        An exposed person was exposed at now_s, and an infected person
+        became infectious at now_s, so was exposed an incubation time
+        earlier.
+        """
+        if seir == _I:
+            now_s -= self.incubation_s
+        self.set_infected_when(index, now_s)
+
+    def set_infected_when(self, index, when) -> None:
+        """Sets the time of exposure of a person and their deadlines.
+
+        The time can be a datetime or seconds since the epoch.
+        """
+        when = np.datetime64(when, 's')
+        self.infected_when[index] = when
+        self.onset_at[index] = when + self._until_onset
+        self.recover_at[index] = when + self._until_recovery
+        self.next_transition_s = TRANSITION_NOW
+
+    def add_location(self, location) -> int:
+        """Allocates a location and returns its index."""
+        index = len(self.locations)
+        if index == len(self.loc_beta_per_s):
+            capacity = 2 * len(self.loc_beta_per_s)
+            self.loc_beta_per_s = _grow(self.loc_beta_per_s, capacity)
+            self.loc_scheduled = _grow(self.loc_scheduled, capacity)
+        self.locations.append(location)
+        return index
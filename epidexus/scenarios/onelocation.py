@@ -32,7 +32,7 @@ class OneLocation:
         self._home_location.infection_rate = infection_rate
 
     def set_seed(self, new_seed: int):
-        np.random.seed(new_seed)
+        self.sim_model.rng = np.random.default_rng(new_seed)
 
     @property
     def control_variable(self):
@@ -44,8 +44,7 @@ class OneLocation:
         self._home_location.infection_rate = self._initial_rate * (1-u)
 
     def simulate(self, interval: timedelta):
-        sim_until = self.sim_model.current_date + interval
-        while(self.sim_model.current_date < sim_until):
-            self.sim_model.step()
+        # Step until the interval has passed, rounding up.
+        self.sim_model.run(-(-interval // self.sim_model.sim_time_step))
 
 
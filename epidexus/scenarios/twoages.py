@@ -29,6 +29,8 @@ class TwoAges:
                  num_infected_young = 0, num_infected_old = 0):
 
         self.sim_model = EpidexusModel(start_date, sim_time_step=sim_time_step)
+        # The control variables, so the setters can skip repeated values.
+        self._u11 = self._u12 = self._u22 = None
 
         self._old_people, self._old_location = create_family(self.sim_model, num_old)
         for p in self._old_people:
@@ -54,7 +56,7 @@ class TwoAges:
         self.restriction_young = 0
 
     def set_seed(self, new_seed: int):
-        np.random.seed(new_seed)
+        self.sim_model.rng = np.random.default_rng(new_seed)
 
     @property
     def restriction_young(self):
@@ -62,15 +64,19 @@ class TwoAges:
 
     @restriction_young.setter
     def restriction_young(self, u):
+        if u == self._u11:
+            return
         self._u11 = u
         self._young_location.infection_rate = self._initial_rate_young * (1-u)
 
     @property
     def restriction_old(self):
-        return self._u11
+        return self._u22
 
     @restriction_old.setter
     def restriction_old(self, u):
+        if u == self._u22:
+            return
         self._u22 = u
         self._old_location.infection_rate = self._initial_rate_old * (1-u)
 
@@ -80,12 +86,13 @@ class TwoAges:
 
     @restriction_young_to_old.setter
     def restriction_young_to_old(self, u):
+        if u == self._u12:
+            return
         self._u12 = u
         self._meet_old_it.leave_when = self._meet_old_it.go_when + self._initial_meeting_duration * (1-u)
 
     def simulate(self, interval: timedelta):
-        sim_until = self.sim_model.current_date + interval
-        while(self.sim_model.current_date < sim_until):
-            self.sim_model.step()
+        # Step until the interval has passed, rounding up.
+        self.sim_model.run(-(-interval // self.sim_model.sim_time_step))
 
 
@@ -18,7 +18,7 @@
 
 from typing import List
 from epidexus import EpidexusModel, Location, Person, ItineraryEntry
-from numpy.random import normal
+import numpy as np
 
 
 def create_family(sim_model: EpidexusModel, num_people: int,
@@ -27,7 +27,7 @@ def create_family(sim_model: EpidexusModel, num_people: int,
 
     Creates the [num_people] number of family members with
     a common home location. The people are added to the
-    simulation model scheduler. A list of people are also
+    simulation model. A list of people are also
     returned, e.g. to be used in subsequent claiming from
     schools and workplaces. In addition the home location
     is also returned.
@@ -66,38 +66,30 @@ def create_family_prob(sim_model: EpidexusModel,
 
     Like the create_family, this function creates the a number of family
     members with a common home location. The people are added to the simulation
-    model scheduler. A list of people are also returned, e.g. to be used in
+    model. A list of people are also returned, e.g. to be used in
     subsequent claiming from schools and workplaces. In addition the home
     location is also returned.
 
+    The numbers and ages are drawn from the random number generator
+    of the model, negative ages are set to 0.
+
     TODO: The age distribution probably should be a gamma or other non-negative distribution.
 
     Returns: (people, home_location)
     """
+    rng = sim_model.rng
     people = []
-    home_loc = Location(sim_model, "Home", infection_probability=0.1)
+    home_loc = Location(sim_model, "Home", infection_rate=0.1)
     sim_model.add_location(home_loc)
-    #Generate adults (at least one)
-    num_adults = round(normal(num_adult_mean, num_adult_sd))
-    age = round(normal(age_adult_mean, age_adult_sd))
-    if age < 0:
-        age = 0
-    primary_person = Person(sim_model, home_loc, age=age)
-    sim_model.add_person(primary_person)
-    people.append(primary_person)
-    for i in range(num_adults-1):  # pylint: disable=unused-variable
-        age = round(normal(age_adult_mean, age_adult_sd))
-        if age < 0:
-            age = 0
-        p = Person(sim_model, home_loc, age=age)
-        sim_model.add_person(p)
-        people.append(p)
-    #Generate kids
-    num_kids = round(normal(num_children_mean, num_children_sd))
-    for i in range(num_kids):  # pylint: disable=unused-variable
-        age = round(normal(age_children_mean, age_children_sd))
-        if age < 0:
-            age = 0
+    # At least one adult
+    num_adults = max(int(round(rng.normal(num_adult_mean, num_adult_sd))), 1)
+    num_kids = max(int(round(rng.normal(num_children_mean, num_children_sd))), 0)
+    # Draw the ages of the adults and then the kids in one go
+    ages = rng.normal(np.repeat([age_adult_mean, age_children_mean],
+                                [num_adults, num_kids]),
+                      np.repeat([age_adult_sd, age_children_sd],
+                                [num_adults, num_kids]))
+    for age in np.round(ages).clip(0).astype(int).tolist():
         p = Person(sim_model, home_loc, age=age)
         sim_model.add_person(p)
         people.append(p)
@@ -108,14 +100,19 @@ def create_family_prob(sim_model: EpidexusModel,
 def claim_by_age(people: List[Person], it_entry: ItineraryEntry, min_age: int, max_age: int, max_num=1):
     """Location makes a claim on a number of people by age.
 
+    The first max_num people in the age range get the itinerary entry.
+    The ages are compared in one go on the model's age array.
+
     Returns -- A list with the claimed persons removed
     """
-    count = 0
-    unclaimed = []
-    for p in people:
-        if ((min_age <= p.age <= max_age) and count < max_num):
-            p.itinerary.add_entry(it_entry)
-            count +=1
-        else:
-            unclaimed.append(p)
-    return unclaimed
\ No newline at end of file
+    if len(people) == 0:
+        return []
+    indices = np.fromiter((p._index for p in people), dtype=np.intp,
+                          count=len(people))
+    ages = people[0].model.population.age[indices]
+    claimed = np.flatnonzero((min_age <= ages) & (ages <= max_age))[:max_num]
+    unclaimed = np.ones(len(people), dtype=np.bool_)
+    unclaimed[claimed] = False
+    for i in claimed.tolist():
+        people[i].itinerary.add_entry(it_entry)
+    return [people[i] for i in np.flatnonzero(unclaimed).tolist()]